@@ -1,18 +1,98 @@
 import os
 import logging
+import logging.handlers
+import atexit
 import time
-import json
-from flask import Flask, render_template, request, jsonify, session
+import pickle
+import codecs
+import errno
+import shutil
+import functools
+import secrets
+import hashlib
+from collections import OrderedDict
+from urllib.parse import unquote
+from flask import Flask, render_template, request, jsonify, session, Response
+from flask.json.provider import DefaultJSONProvider
 from werkzeug.utils import secure_filename
-import traceback
+from selenium.common.exceptions import (
+    WebDriverException,
+    TimeoutException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    ElementNotInteractableException,
+    ElementClickInterceptedException,
+)
+from urllib3.exceptions import HTTPError as DriverConnectionError
 import tempfile
 import threading
+import queue
+import itertools
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from utils.spreadsheet_parser import parse_spreadsheet
 from utils.selenium_driver import MerchAutomation
 
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library json module
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that serializes with orjson when it is installed.
+    
+    orjson is opt-in: it isn't a project dependency, and without it this behaves exactly
+    like Flask's default provider. Dates, non-string keys, sorted keys and debug-mode
+    indentation are handled the same way Flask does. The one difference is that non-ASCII
+    text is written as UTF-8 rather than as \\u escapes, which decodes to the same data.
+    """
+    
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj).decode()
+    
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        # Pretty-print in debug mode unless compact output was requested, like Flask does
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self._orjson_dumps(obj, indent), mimetype=self.mimetype)
+    
+    def _orjson_dumps(self, obj, indent=False):
+        # Let self.default format dates as HTTP dates, like Flask's provider does
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option)
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves message and traceback formatting to the listener thread"""
+    
+    def prepare(self, record):
+        # The queue never leaves this process, so the record can be passed through as is
+        return record
+
+def setup_logging(level=logging.INFO):
+    """Route log records through a queue so formatting and output happen on a background thread"""
+    log_queue = queue.Queue(-1)
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    
+    listener.start()
+    atexit.register(listener.stop)
+
 # Initialize Flask application
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.secret_key = os.environ.get("SESSION_SECRET", "fallback_secret_key")
 
 # Global variables to track upload state
@@ -26,46 +106,366 @@ upload_status = {
     "current_product": ""
 }
 
+# Per-session upload data (file paths, image paths and mappings), keyed by a short token
+# kept in the session cookie so large image lists don't bloat the signed cookie.
+# The least recently used sessions are evicted once there are too many.
+UPLOAD_STATE = OrderedDict()
+UPLOAD_STATE_SIZE = 256
+_upload_state_lock = threading.Lock()
+
+# In-progress resumable spreadsheet uploads, keyed by upload id. Uploads that receive no
+# data for RESUMABLE_UPLOAD_TTL seconds are dropped and their partial files deleted.
+RESUMABLE_UPLOADS = {}
+MAX_RESUMABLE_UPLOADS = 16
+MAX_RESUMABLE_UPLOADS_PER_SESSION = 2
+RESUMABLE_UPLOAD_TTL = 30 * 60
+_resumable_lock = threading.Lock()
+
+# Chrome can only be driven when the app runs on the user's own machine. Set LOCAL_EXECUTION=1
+# there; everywhere else uploads are only simulated and no browser is ever started.
+LOCAL_EXECUTION = os.environ.get("LOCAL_EXECUTION", "").lower() in ("1", "true", "yes")
+
+# Warm browser drivers shared by all upload runs. Selenium drivers are not thread-safe,
+# so each upload worker checks a driver out of the pool and returns it when done.
+DRIVER_POOL_SIZE = max(1, int(os.environ.get("DRIVER_POOL_SIZE", 2)))
+DRIVER_POOL = queue.Queue()
+_pool_drivers = []  # Every driver that was started, so they can all be closed at exit
+_driver_pool_lock = threading.Lock()
+_driver_pool_started = False
+_driver_pool_ready = threading.Event()
+_driver_slots = threading.Semaphore(DRIVER_POOL_SIZE)  # One slot per driver checked out by /start
+# Errors from a page that didn't look as expected - only the current product failed
+_PRODUCT_ERRORS = (
+    TimeoutException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    ElementNotInteractableException,
+    ElementClickInterceptedException,
+)
+# Any other driver error, or losing the connection to chromedriver (urllib3's MaxRetryError
+# and ProtocolError don't subclass ConnectionError), means the browser itself is gone
+_DRIVER_CRASH_ERRORS = (WebDriverException, DriverConnectionError, ConnectionError)
+
+# Parse results of recently uploaded spreadsheets, keyed by a hash of the file contents,
+# so uploading the same spreadsheet again skips parsing
+PARSE_CACHE = OrderedDict()
+PARSE_CACHE_SIZE = 32
+_parse_cache_lock = threading.Lock()
+
 upload_thread = None
-upload_pause_event = threading.Event()
+upload_resume_event = threading.Event()  # Cleared while the upload is paused
+upload_resume_event.set()
 upload_stop_event = threading.Event()
 
-# Set up temporary folders for file uploads
+# Guards upload_status, which is written by the upload worker threads and read by /status.
+# The serialized status is cached until the next write.
+_status_lock = threading.Lock()
+_status_cache = {"bytes": None, "dirty": True}
+
+# Set up temporary folders for file uploads, removed again when the process exits
 SPREADSHEET_FOLDER = tempfile.mkdtemp()
 IMAGES_FOLDER = tempfile.mkdtemp()
+# Partial resumable uploads live inside the spreadsheet folder so completing one is an atomic rename
+PARTIAL_FOLDER = tempfile.mkdtemp(dir=SPREADSHEET_FOLDER)
+
 ALLOWED_SPREADSHEET_EXTENSIONS = {'csv', 'xlsx', 'xls'}
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+_SPREADSHEET_SUFFIXES = tuple('.' + ext for ext in ALLOWED_SPREADSHEET_EXTENSIONS)
+_IMAGE_SUFFIXES = tuple('.' + ext for ext in ALLOWED_IMAGE_EXTENSIONS)
 
 app.config['SPREADSHEET_FOLDER'] = SPREADSHEET_FOLDER
 app.config['IMAGES_FOLDER'] = IMAGES_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 64 * 1024 * 1024  # 64MB max upload size
+STREAM_CHUNK_SIZE = 1 << 20  # 1MB chunks when streaming raw request bodies to disk
+IMAGE_SAVE_WORKERS = 8  # Parallel disk writes for batched image uploads
+PRODUCT_BATCH_SIZE = 1024  # Products per pickled batch in the parsed spreadsheet cache
+SPREADSHEET_SNIFF_SIZE = 4096  # Bytes read to detect the spreadsheet format
 
+# File signatures for Excel workbooks (xlsx is a zip archive, xls an OLE2 compound file)
+_XLSX_MAGIC = b'PK\x03\x04'
+_XLS_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+_SPREADSHEET_FAMILIES = {'csv': 'csv', 'xlsx': 'excel', 'xls': 'excel'}
+
+@functools.lru_cache(maxsize=1024)
 def allowed_spreadsheet_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_SPREADSHEET_EXTENSIONS
+    return filename.lower().endswith(_SPREADSHEET_SUFFIXES)
 
+@functools.lru_cache(maxsize=1024)
 def allowed_image_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_IMAGE_EXTENSIONS
+    return filename.lower().endswith(_IMAGE_SUFFIXES)
+
+@functools.lru_cache(maxsize=4096)
+def _sf(name):
+    """Cached secure_filename - batched image uploads often repeat filenames"""
+    return secure_filename(name)
 
 @app.route('/')
 def index():
     """Render the main page"""
     return render_template('index.html')
 
+def get_upload_state(create=True):
+    """Get the server-side upload state for the current session.
+    
+    If the session has no state yet, it is created unless `create` is False, in which
+    case None is returned.
+    """
+    token = session.get('token')
+    with _upload_state_lock:
+        if token is not None and token in UPLOAD_STATE:
+            UPLOAD_STATE.move_to_end(token)
+            return UPLOAD_STATE[token]
+        
+        if not create:
+            return None
+        
+        token = secrets.token_urlsafe(16)
+        session['token'] = token
+        UPLOAD_STATE[token] = {}
+        while len(UPLOAD_STATE) > UPLOAD_STATE_SIZE:
+            UPLOAD_STATE.popitem(last=False)
+        return UPLOAD_STATE[token]
+
+def update_status(**kv):
+    """Update fields of the upload status"""
+    with _status_lock:
+        upload_status.update(kv)
+        _status_cache["dirty"] = True
+
+def increment_status(key):
+    """Increment a counter in the upload status"""
+    with _status_lock:
+        upload_status[key] += 1
+        _status_cache["dirty"] = True
+
+def add_status_error(product, title, error):
+    """Record an error in the upload status"""
+    with _status_lock:
+        upload_status["errors"].append({
+            "product": product,
+            "title": title,
+            "error": error
+        })
+        _status_cache["dirty"] = True
+
+def reset_upload_status():
+    """Reset the upload status for a new spreadsheet"""
+    update_status(
+        total=0,
+        current=0,
+        success=0,
+        failed=0,
+        status="idle",
+        errors=[],
+        current_product=""
+    )
+
+def _stream_fileno(stream):
+    """Return the OS file descriptor behind an upload stream, or None if it has none"""
+    # Werkzeug spools small uploads in memory; asking for their fileno would force them to disk
+    if not getattr(stream, '_rolled', True):
+        return None
+    try:
+        return stream.fileno()
+    except (AttributeError, OSError):
+        return None
+
+def new_file_hasher():
+    """Create the hash object used to identify spreadsheet contents"""
+    return hashlib.blake2b(digest_size=16)
+
+def save_stream(stream, file_path, hasher=None):
+    """Copy an uploaded file or raw request body to disk.
+    
+    Streams backed by a real file are copied by the kernel with os.copy_file_range,
+    everything else is copied in fixed-size chunks. If a hasher is given, every chunk is
+    fed to it on the way through, so the data has to pass through Python.
+    """
+    with open(file_path, 'wb', buffering=STREAM_CHUNK_SIZE) as dst:
+        if hasher is not None:
+            while True:
+                chunk = stream.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    return
+                hasher.update(chunk)
+                dst.write(chunk)
+        
+        src_fd = _stream_fileno(stream)
+        if src_fd is not None and hasattr(os, 'copy_file_range'):
+            start = offset = stream.tell()
+            remaining = os.fstat(src_fd).st_size - offset
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(src_fd, dst.fileno(), remaining, offset_src=offset)
+                    if copied == 0:
+                        break
+                    offset += copied
+                    remaining -= copied
+                return
+            except OSError:
+                # Not supported for this pair of files - carry on from where the kernel stopped
+                stream.seek(offset)
+                dst.seek(offset - start)
+        
+        shutil.copyfileobj(stream, dst, length=STREAM_CHUNK_SIZE)
+
+def write_product_batches(products, parsed_path):
+    """Write products to disk as a sequence of pickled batches.
+    
+    The file is written under a temporary name and then moved into place, so an upload
+    that is still reading an older version of it is never affected.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(parsed_path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for start in range(0, len(products), PRODUCT_BATCH_SIZE):
+                pickle.dump(products[start:start + PRODUCT_BATCH_SIZE], f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, parsed_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def read_product_batches(parsed_file):
+    """Yield the batches written by write_product_batches one at a time.
+    
+    Takes a file that is already open, so the products can still be read after the
+    parse cache evicts and deletes the file.
+    """
+    while True:
+        try:
+            yield pickle.load(parsed_file)
+        except EOFError:
+            return
+
+def detect_spreadsheet_type(file_path):
+    """Detect the format of a saved spreadsheet from its first bytes.
+    
+    Returns 'xlsx', 'xls' or 'csv', or None if the file doesn't look like a spreadsheet.
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(SPREADSHEET_SNIFF_SIZE)
+    
+    if head.startswith(_XLSX_MAGIC):
+        return 'xlsx'
+    if head.startswith(_XLS_MAGIC):
+        return 'xls'
+    if not head or b'\x00' in head:
+        return None
+    
+    # Anything else that is UTF-8 text is treated as CSV and left to the parser to validate.
+    # The incremental decoder tolerates a character cut off at the end of the sample.
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+    except UnicodeDecodeError:
+        return None
+    return 'csv'
+
+def _cached_parse(digest):
+    """Look up the parse result for a spreadsheet hash, or None if it isn't cached"""
+    with _parse_cache_lock:
+        entry = PARSE_CACHE.get(digest)
+        if entry is None:
+            return None
+        if not os.path.exists(entry["parsed_path"]):
+            del PARSE_CACHE[digest]
+            return None
+        PARSE_CACHE.move_to_end(digest)
+        return entry
+
+def _cache_parse(digest, entry):
+    """Remember the parse result for a spreadsheet hash, evicting the least recently used"""
+    evicted = []
+    with _parse_cache_lock:
+        PARSE_CACHE[digest] = entry
+        PARSE_CACHE.move_to_end(digest)
+        while len(PARSE_CACHE) > PARSE_CACHE_SIZE:
+            evicted.append(PARSE_CACHE.popitem(last=False)[1]["parsed_path"])
+    
+    # A running upload that is reading one of these keeps its open file
+    for parsed_path in evicted:
+        try:
+            os.remove(parsed_path)
+        except FileNotFoundError:
+            pass
+
+def process_spreadsheet(file_path, digest):
+    """Parse a saved spreadsheet and store the results in the upload state.
+    
+    `digest` is the hash of the file contents. If the same spreadsheet was parsed
+    recently, the cached result is used instead of parsing it again.
+    """
+    # Reject files whose contents don't match their extension before invoking the parser
+    extension = os.path.splitext(file_path)[1].lower().lstrip('.')
+    detected_type = detect_spreadsheet_type(file_path)
+    if detected_type is None or _SPREADSHEET_FAMILIES[detected_type] != _SPREADSHEET_FAMILIES.get(extension):
+        os.remove(file_path)
+        return jsonify({'error': f'File contents do not match a .{extension} spreadsheet'}), 400
+    
+    try:
+        entry = _cached_parse(digest)
+        if entry is None:
+            # Parse the spreadsheet to validate data (without validating image paths)
+            products = parse_spreadsheet(file_path)
+            
+            # Fill in missing titles once here so the upload worker can index them directly
+            for i, product in enumerate(products):
+                product.setdefault('title', f'Product {i+1}')
+            
+            # Cache the parsed products so the upload worker doesn't parse the spreadsheet again.
+            # Name them after the content hash so another file with the same name can't replace them.
+            parsed_path = os.path.join(app.config['SPREADSHEET_FOLDER'], digest.hex() + ".pkl")
+            write_product_batches(products, parsed_path)
+            
+            # Store the list of image paths so we can display them for upload
+            entry = {
+                "parsed_path": parsed_path,
+                "product_count": len(products),
+                "image_paths": [product['image_path'] for product in products]
+            }
+            _cache_parse(digest, entry)
+        
+        parsed_path = entry["parsed_path"]
+        product_count = entry["product_count"]
+        image_paths = entry["image_paths"]
+        
+        # Start the browsers now so they are warm by the time the upload is started
+        if LOCAL_EXECUTION:
+            warm_driver_pool()
+        
+        # Store the file path, product count and image paths in the upload state
+        state = get_upload_state()
+        with _upload_state_lock:
+            state.update(
+                file_path=file_path,
+                parsed_path=parsed_path,
+                product_count=product_count,
+                image_paths=image_paths
+            )
+        
+        return jsonify({
+            'success': True,
+            'message': f'Spreadsheet uploaded successfully. Found {product_count} products to upload.',
+            'count': product_count,
+            'image_paths': image_paths
+        })
+    
+    except Exception as e:
+        logging.exception("Error processing spreadsheet: %s", e)
+        return jsonify({'error': f'Error processing spreadsheet: {str(e)}'}), 500
+
+def unique_spreadsheet_path(filename):
+    """Build a unique path in the spreadsheet folder for an uploaded spreadsheet.
+    
+    Two uploads with the same name can be in flight at once, and each one must parse
+    exactly the bytes it hashed, so a random token is prefixed to keep them apart.
+    """
+    return os.path.join(app.config['SPREADSHEET_FOLDER'], f"{secrets.token_hex(8)}_{_sf(filename)}")
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     """Handle spreadsheet upload and validation"""
-    global upload_status
-    
     # Reset status on new upload
-    upload_status = {
-        "total": 0,
-        "current": 0,
-        "success": 0,
-        "failed": 0,
-        "status": "idle",
-        "errors": [],
-        "current_product": ""
-    }
+    reset_upload_status()
     
     # Check if a file was uploaded
     if 'file' not in request.files:
@@ -79,138 +479,447 @@ def upload_file():
         return jsonify({'error': f'File type not allowed. Please upload one of: {", ".join(ALLOWED_SPREADSHEET_EXTENSIONS)}'}), 400
     
     # Save the file
-    filename = secure_filename(file.filename or "")  # Handle possible None
-    file_path = os.path.join(app.config['SPREADSHEET_FOLDER'], filename)
-    file.save(file_path)
+    file_path = unique_spreadsheet_path(file.filename or "")  # Handle possible None
+    hasher = new_file_hasher()
+    save_stream(file.stream, file_path, hasher)
+    
+    return process_spreadsheet(file_path, hasher.digest())
+
+@app.route('/upload_stream', methods=['POST'])
+def upload_file_stream():
+    """Handle a spreadsheet sent as a raw request body, bypassing multipart parsing"""
+    # Reset status on new upload
+    reset_upload_status()
+    
+    # The original filename is sent URL-encoded in a header
+    original_filename = unquote(request.headers.get('X-Filename', ''))
+    if original_filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+    
+    if not allowed_spreadsheet_file(original_filename):
+        return jsonify({'error': f'File type not allowed. Please upload one of: {", ".join(ALLOWED_SPREADSHEET_EXTENSIONS)}'}), 400
+    
+    # Save the file
+    file_path = unique_spreadsheet_path(original_filename)
+    hasher = new_file_hasher()
+    save_stream(request.stream, file_path, hasher)
+    
+    return process_spreadsheet(file_path, hasher.digest())
+
+def _expire_resumable_uploads():
+    """Drop resumable uploads that have been idle too long and delete their partial files"""
+    now = time.monotonic()
+    expired = []
+    with _resumable_lock:
+        for upload_id, upload in list(RESUMABLE_UPLOADS.items()):
+            # Skip uploads that are receiving a chunk right now
+            if now - upload["updated"] > RESUMABLE_UPLOAD_TTL and upload["lock"].acquire(blocking=False):
+                del RESUMABLE_UPLOADS[upload_id]
+                upload["lock"].release()
+                expired.append(upload["path"])
+    
+    for path in expired:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def _get_resumable_upload(upload_id):
+    """Look up an in-progress resumable upload, or None if it doesn't exist or has expired"""
+    _expire_resumable_uploads()
+    with _resumable_lock:
+        return RESUMABLE_UPLOADS.get(upload_id)
+
+@app.route('/uploads', methods=['POST'])
+def create_resumable_upload():
+    """Create a resumable spreadsheet upload that is sent in chunks with PATCH"""
+    original_filename = unquote(request.headers.get('X-Filename', ''))
+    if original_filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+    
+    if not allowed_spreadsheet_file(original_filename):
+        return jsonify({'error': f'File type not allowed. Please upload one of: {", ".join(ALLOWED_SPREADSHEET_EXTENSIONS)}'}), 400
     
     try:
-        # Parse the spreadsheet to validate data (without validating image paths)
-        products = parse_spreadsheet(file_path)
+        length = int(request.headers.get('Upload-Length', ''))
+    except ValueError:
+        return jsonify({'error': 'Missing or invalid Upload-Length header'}), 400
+    
+    if length <= 0 or length > app.config['MAX_CONTENT_LENGTH']:
+        return jsonify({'error': 'Upload-Length is out of range'}), 413
+    
+    # Limit how many uploads can be open at once, in total and for this session
+    _expire_resumable_uploads()
+    get_upload_state()
+    owner = session['token']
+    upload_id = secrets.token_urlsafe(16)
+    with _resumable_lock:
+        if len(RESUMABLE_UPLOADS) >= MAX_RESUMABLE_UPLOADS:
+            return jsonify({'error': 'Too many uploads in progress, please try again later'}), 503
         
-        # Store the file path and product count in the session
-        session['file_path'] = file_path
-        session['product_count'] = len(products)
+        if sum(upload["owner"] == owner for upload in RESUMABLE_UPLOADS.values()) >= MAX_RESUMABLE_UPLOADS_PER_SESSION:
+            return jsonify({'error': 'Too many uploads in progress for this session'}), 429
         
-        # Store the list of image paths so we can display them for upload
-        image_paths = [product['image_path'] for product in products]
-        session['image_paths'] = image_paths
+        # The file starts empty and grows as chunks arrive
+        partial_path = os.path.join(PARTIAL_FOLDER, upload_id)
+        open(partial_path, 'wb').close()
         
-        return jsonify({
-            'success': True,
-            'message': f'Spreadsheet uploaded successfully. Found {len(products)} products to upload.',
-            'count': len(products),
-            'image_paths': image_paths
-        })
+        RESUMABLE_UPLOADS[upload_id] = {
+            "path": partial_path,
+            "filename": _sf(original_filename),
+            "owner": owner,
+            "length": length,
+            "offset": 0,
+            "updated": time.monotonic(),
+            "hasher": new_file_hasher(),
+            "lock": threading.Lock()
+        }
     
-    except Exception as e:
-        logging.error(f"Error processing spreadsheet: {str(e)}")
-        logging.error(traceback.format_exc())
-        return jsonify({'error': f'Error processing spreadsheet: {str(e)}'}), 500
+    response = jsonify({'success': True, 'id': upload_id, 'offset': 0})
+    response.status_code = 201
+    response.headers['Location'] = f'/uploads/{upload_id}'
+    response.headers['Upload-Offset'] = '0'
+    return response
+
+@app.route('/uploads/<upload_id>', methods=['HEAD'])
+def resumable_upload_offset(upload_id):
+    """Report how much of a resumable upload has been received"""
+    upload = _get_resumable_upload(upload_id)
+    if upload is None:
+        return '', 404
+    
+    return '', 200, {
+        'Upload-Offset': str(upload["offset"]),
+        'Upload-Length': str(upload["length"]),
+        'Cache-Control': 'no-store'
+    }
 
-def upload_worker(file_path, headless, delay):
-    """Worker function to handle the upload process in the background"""
-    global upload_status
+@app.route('/uploads/<upload_id>', methods=['PATCH'])
+def append_resumable_upload(upload_id):
+    """Append a chunk to a resumable upload, processing the spreadsheet once it is complete"""
+    upload = _get_resumable_upload(upload_id)
+    if upload is None:
+        return jsonify({'error': 'Unknown upload'}), 404
+    
+    if not upload["lock"].acquire(blocking=False):
+        return jsonify({'error': 'Another chunk is already being written for this upload'}), 409
     
     try:
-        # Parse the spreadsheet
-        products = parse_spreadsheet(file_path)
-        upload_status["total"] = len(products)
-        upload_status["status"] = "running"
+        # The upload may have expired between the lookup and taking its lock
+        with _resumable_lock:
+            if RESUMABLE_UPLOADS.get(upload_id) is not upload:
+                return jsonify({'error': 'Unknown upload'}), 404
         
-        # Set the upload status to a special message
-        upload_status["errors"].append({
-            "product": "note",
-            "title": "Local Execution Required",
-            "error": "This batch uploader needs to be run on your local machine to access Chrome. Please download this code and run it locally."
-        })
+        # Chunks must continue exactly where the last one stopped
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+        except ValueError:
+            return jsonify({'error': 'Missing or invalid Upload-Offset header'}), 400
         
-        # Simulate "running" for a few seconds then set to completed
-        time.sleep(5)
-        upload_status["status"] = "completed"
+        if offset != upload["offset"]:
+            return jsonify({'error': 'Upload-Offset does not match the received data', 'offset': upload["offset"]}), 409
         
-        # Early return - we can't run Chrome in this environment
-        return
+        # Write unbuffered so the recorded offset only counts bytes that reached the file
+        length = upload["length"]
+        try:
+            with open(upload["path"], 'r+b', buffering=0) as f:
+                f.seek(offset)
+                try:
+                    while offset < length:
+                        chunk = request.stream.read(min(STREAM_CHUNK_SIZE, length - offset))
+                        if not chunk:
+                            break
+                        view = memoryview(chunk)
+                        while view:
+                            written = f.write(view)
+                            upload["hasher"].update(view[:written])
+                            offset += written
+                            view = view[written:]
+                finally:
+                    # Keep whatever arrived so the client can resume after a dropped connection
+                    upload["offset"] = offset
+                    upload["updated"] = time.monotonic()
+        except OSError as e:
+            if e.errno != errno.ENOSPC:
+                raise
+            return jsonify({'error': 'Not enough storage space to save the upload', 'offset': offset}), 507
         
-        # The code below will only run when executed locally
-        # Initialize Selenium automation - always set headless to False since user wants to see the browser
-        # automation = MerchAutomation(headless=False)
+        if offset < length:
+            response = jsonify({'success': True, 'offset': offset})
+            response.headers['Upload-Offset'] = str(offset)
+            return response
         
-        # Check if we're using uploaded images
-        # image_mappings = session.get('image_mappings', {})
+        # The upload is complete - move it into place and process it like a regular upload
+        with _resumable_lock:
+            RESUMABLE_UPLOADS.pop(upload_id, None)
+        file_path = unique_spreadsheet_path(upload["filename"])
+        os.replace(upload["path"], file_path)
         
-        # Start the upload process
-        for i, product in enumerate(products):
-            # Check if the upload has been stopped
+        reset_upload_status()
+        return process_spreadsheet(file_path, upload["hasher"].digest())
+    
+    finally:
+        upload["lock"].release()
+
+def _start_drivers():
+    """Start the pooled browser drivers, skipping any that fail to start"""
+    try:
+        for _ in range(DRIVER_POOL_SIZE):
+            try:
+                # Always set headless to False since user wants to see the browser
+                automation = MerchAutomation(headless=False)
+            except Exception as e:
+                logging.exception("Could not start browser driver: %s", e)
+                continue
+            with _driver_pool_lock:
+                _pool_drivers.append(automation)
+            DRIVER_POOL.put(automation)
+    finally:
+        _driver_pool_ready.set()
+
+def warm_driver_pool():
+    """Start the browser drivers in the background, unless they are running or starting.
+    
+    If a previous warm-up couldn't start any driver, or every driver has since crashed,
+    they are started again.
+    """
+    global _driver_pool_started
+    
+    with _driver_pool_lock:
+        if _driver_pool_started and (_pool_drivers or not _driver_pool_ready.is_set()):
+            return
+        _driver_pool_started = True
+        _driver_pool_ready.clear()
+    
+    threading.Thread(target=_start_drivers, daemon=True).start()
+
+def _replace_driver(automation):
+    """Close a crashed driver and start a new one in its place, or return None if that fails"""
+    with _driver_pool_lock:
+        _pool_drivers.remove(automation)
+    try:
+        automation.close()
+    except Exception as e:
+        logging.warning("Error closing crashed browser driver: %s", e)
+    
+    try:
+        replacement = MerchAutomation(headless=False)
+    except Exception as e:
+        logging.exception("Could not restart browser driver: %s", e)
+        return None
+    
+    with _driver_pool_lock:
+        _pool_drivers.append(replacement)
+    return replacement
+
+def _checkout_driver():
+    """Take a driver from the pool, or return None if the upload is stopped while waiting"""
+    while True:
+        try:
+            return DRIVER_POOL.get(timeout=1)
+        except queue.Empty:
+            # Only happens when crashed drivers couldn't be replaced
             if upload_stop_event.is_set():
-                upload_status["status"] = "stopped"
-                break
-            
-            # Check if the upload has been paused
-            while upload_pause_event.is_set() and not upload_stop_event.is_set():
-                upload_status["status"] = "paused"
-                time.sleep(1)
+                return None
+            if not _pool_drivers:
+                raise RuntimeError("No browser driver is running")
+
+@atexit.register
+def close_driver_pool():
+    """Quit all pooled browser drivers"""
+    for automation in list(_pool_drivers):
+        try:
+            automation.close()
+        except Exception as e:
+            logging.warning("Error closing browser driver: %s", e)
+
+@atexit.register
+def remove_upload_folders():
+    """Delete the temporary upload folders and everything in them"""
+    for folder in (SPREADSHEET_FOLDER, IMAGES_FOLDER):
+        shutil.rmtree(folder, ignore_errors=True)
+
+def _upload_one(i, product, image_mappings, delay):
+    """Upload a single product using a driver checked out of the pool.
+    
+    Returns False if the upload was stopped before this product started.
+    """
+    # Check if the upload has been stopped
+    if upload_stop_event.is_set():
+        return False
+    
+    # Check if the upload has been paused - block until it is resumed or stopped
+    if not upload_resume_event.is_set():
+        update_status(status="paused")
+        upload_resume_event.wait()
+    
+    if upload_stop_event.wait(timeout=0):
+        return False
+    
+    increment_status("current")
+    update_status(status="running", current_product=product['title'])
+    
+    # Check if we have a mapping for this image path
+    original_path = product['image_path']
+    if original_path in image_mappings:
+        # Use the uploaded image path
+        product['image_path'] = image_mappings[original_path]
+        logging.info(f"Using uploaded image for {product['title']}: {product['image_path']}")
+    else:
+        # Use the original path (this will work when running locally)
+        logging.info(f"Using original image path for {product['title']}: {product['image_path']}")
+    
+    automation = _checkout_driver()
+    if automation is None:
+        return False
+    
+    try:
+        # Upload the product
+        automation.upload_product(product)
+        time.sleep(delay)  # Add a delay between uploads to avoid rate limiting
+    except _PRODUCT_ERRORS:
+        raise
+    except _DRIVER_CRASH_ERRORS:
+        # Don't hand a dead browser to the next product
+        automation = _replace_driver(automation)
+        raise
+    finally:
+        if automation is not None:
+            DRIVER_POOL.put(automation)
+    
+    return True
+
+def upload_worker(parsed_file, product_count, headless, delay, workers=1, image_mappings=None):
+    """Worker function to handle the upload process in the background.
+    
+    Closes `parsed_file` and releases the `workers` driver slots acquired by /start
+    when it finishes.
+    """
+    image_mappings = image_mappings or {}
+    
+    try:
+        update_status(total=product_count, status="running")
+        
+        if not LOCAL_EXECUTION:
+            # Set the upload status to a special message
+            add_status_error(
+                "note",
+                "Local Execution Required",
+                "This batch uploader needs to be run on your local machine to access Chrome. Please download this code and run it locally."
+            )
             
-            upload_status["status"] = "running"
-            upload_status["current"] = i + 1
-            upload_status["current_product"] = product.get('title', f'Product {i+1}')
+            # Simulate "running" for a few seconds then set to completed
+            time.sleep(5)
+            update_status(status="completed")
             
-            try:
-                # Check if we have a mapping for this image path
-                original_path = product['image_path']
-                if original_path in image_mappings:
-                    # Use the uploaded image path
-                    product['image_path'] = image_mappings[original_path]
-                    logging.info(f"Using uploaded image for {product['title']}: {product['image_path']}")
-                else:
-                    # Use the original path (this will work when running locally)
-                    logging.info(f"Using original image path for {product['title']}: {product['image_path']}")
+            # Early return - we can't run Chrome in this environment
+            return
+        
+        # Wait for the pooled browser drivers, which are normally already warm
+        warm_driver_pool()
+        _driver_pool_ready.wait()
+        if not _pool_drivers:
+            raise RuntimeError("Could not start a browser driver")
+        
+        # Start the upload process, loading the parsed products one batch at a time.
+        # At most PRODUCT_BATCH_SIZE products are in flight; the window is refilled as each
+        # one finishes, so the workers never sit idle waiting for a whole batch to drain.
+        products = enumerate(itertools.chain.from_iterable(read_product_batches(parsed_file)))
+        futures = {}
+        with ThreadPoolExecutor(max_workers=min(workers, len(_pool_drivers))) as executor:
+            while True:
+                while len(futures) < PRODUCT_BATCH_SIZE and not upload_stop_event.is_set():
+                    item = next(products, None)
+                    if item is None:
+                        break
+                    i, product = item
+                    futures[executor.submit(_upload_one, i, product, image_mappings, delay)] = item
                 
-                # Upload the product
-                automation.upload_product(product)
-                upload_status["success"] += 1
-                time.sleep(delay)  # Add a delay between uploads to avoid rate limiting
-            
-            except Exception as e:
-                logging.error(f"Error uploading product {i+1}: {str(e)}")
-                upload_status["failed"] += 1
-                upload_status["errors"].append({
-                    "product": i + 1,
-                    "title": product.get('title', f'Product {i+1}'),
-                    "error": str(e)
-                })
+                if not futures:
+                    break
+                
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, product = futures.pop(future)
+                    
+                    # Check if the upload has been stopped
+                    if upload_stop_event.is_set():
+                        for pending in futures:
+                            pending.cancel()
+                    
+                    if future.cancelled():
+                        continue
+                    
+                    try:
+                        if future.result():
+                            increment_status("success")
+                    
+                    except Exception as e:
+                        logging.error(f"Error uploading product {i+1}: {str(e)}")
+                        increment_status("failed")
+                        add_status_error(i + 1, product['title'], str(e))
         
-        # Clean up
-        automation.close()
-        upload_status["status"] = "completed"
+        update_status(status="stopped" if upload_stop_event.is_set() else "completed")
     
     except Exception as e:
-        logging.error(f"Upload worker error: {str(e)}")
-        logging.error(traceback.format_exc())
-        upload_status["status"] = "error"
-        upload_status["errors"].append({
-            "product": "global",
-            "title": "Global Error",
-            "error": str(e)
-        })
+        logging.exception("Upload worker error: %s", e)
+        update_status(status="error")
+        add_status_error("global", "Global Error", str(e))
+    
+    finally:
+        parsed_file.close()
+        for _ in range(workers):
+            _driver_slots.release()
 
 @app.route('/start', methods=['POST'])
 def start_upload():
     """Start the batch upload process"""
-    global upload_thread, upload_status, upload_pause_event, upload_stop_event
+    global upload_thread
     
-    if 'file_path' not in session:
+    state = get_upload_state(create=False)
+    if state is None or 'parsed_path' not in state:
         return jsonify({'error': 'No file has been uploaded yet'}), 400
     
-    if upload_status["status"] == "running":
+    # A paused run still owns the status and would be resumed by a second run's events
+    if upload_status["status"] in ("running", "paused"):
         return jsonify({'error': 'Upload already in progress'}), 400
     
     # Get configuration options
     data = request.json or {}
     headless = data.get('headless', False)
-    delay = int(data.get('delay', 2))
+    try:
+        delay = int(data.get('delay', 2))
+        workers = min(max(1, int(data.get('workers', 1))), DRIVER_POOL_SIZE)
+        if delay < 0:
+            raise ValueError(delay)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'delay and workers must be whole numbers, and delay cannot be negative'}), 400
+    
+    # Reserve a browser driver for each worker
+    acquired = 0
+    while acquired < workers and _driver_slots.acquire(blocking=False):
+        acquired += 1
+    if acquired < workers:
+        for _ in range(acquired):
+            _driver_slots.release()
+        return jsonify({'error': 'All browser drivers are busy'}), 503
+    
+    with _upload_state_lock:
+        parsed_path = state['parsed_path']
+        product_count = state['product_count']
+        image_mappings = dict(state.get('image_mappings', {}))
+    
+    # The parsed products are deleted when they drop out of the parse cache. Open them now
+    # so an eviction while the worker waits for the browser drivers can't pull them away.
+    try:
+        parsed_file = open(parsed_path, 'rb')
+    except FileNotFoundError:
+        for _ in range(workers):
+            _driver_slots.release()
+        return jsonify({'error': 'The uploaded spreadsheet has expired, please upload it again'}), 400
     
     # Reset control events
-    upload_pause_event.clear()
+    upload_resume_event.set()
     upload_stop_event.clear()
     
     # Get image upload mode (local or remote)
@@ -220,16 +929,35 @@ def start_upload():
     session['image_mode'] = image_mode
     
     # Start the upload process in a separate thread
-    file_path = session['file_path']
     upload_thread = threading.Thread(
         target=upload_worker, 
-        args=(file_path, headless, delay)
+        args=(parsed_file, product_count, headless, delay, workers, image_mappings)
     )
     upload_thread.daemon = True
     upload_thread.start()
     
     return jsonify({'success': True, 'message': 'Upload started'})
 
+def unique_image_path(filename, images_folder):
+    """Build a unique path in the images folder for an uploaded image.
+    
+    Product images from different folders often share a basename (cats/front.png,
+    dogs/front.png), so a random token is prefixed to keep them from overwriting each other.
+    """
+    return os.path.join(images_folder, f"{secrets.token_hex(8)}_{_sf(filename)}")
+
+def store_image_mapping(original_path, file_path):
+    """Store the mapping from original path to uploaded path"""
+    state = get_upload_state()
+    with _upload_state_lock:
+        state.setdefault('image_mappings', {})[original_path] = file_path
+    
+    return jsonify({
+        'success': True, 
+        'message': f'Image uploaded successfully',
+        'path': file_path
+    })
+
 @app.route('/upload_image', methods=['POST'])
 def upload_image():
     """Upload an individual product image"""
@@ -251,26 +979,93 @@ def upload_image():
         return jsonify({'error': 'Missing image index or original path'}), 400
     
     # Save the image
-    filename = secure_filename(image_file.filename or "")  # Handle possible None
-    file_path = os.path.join(app.config['IMAGES_FOLDER'], filename)
-    image_file.save(file_path)
+    file_path = unique_image_path(image_file.filename or "", app.config['IMAGES_FOLDER'])  # Handle possible None
+    save_stream(image_file.stream, file_path)
     
-    # Store the mapping from original path to uploaded path
-    if 'image_mappings' not in session:
-        session['image_mappings'] = {}
+    return store_image_mapping(original_path, file_path)
+
+@app.route('/upload_image_stream', methods=['POST'])
+def upload_image_stream():
+    """Upload an individual product image sent as a raw request body"""
+    # The filename and original path are sent URL-encoded in headers
+    original_filename = unquote(request.headers.get('X-Filename', ''))
+    if original_filename == '':
+        return jsonify({'error': 'No image selected'}), 400
     
-    session['image_mappings'][original_path] = file_path
+    if not allowed_image_file(original_filename):
+        return jsonify({'error': f'Image file type not allowed. Please upload one of: {", ".join(ALLOWED_IMAGE_EXTENSIONS)}'}), 400
+    
+    # Get the image index and original path
+    image_index = request.headers.get('X-Image-Index')
+    original_path = unquote(request.headers.get('X-Original-Path', ''))
+    
+    if not image_index or not original_path:
+        return jsonify({'error': 'Missing image index or original path'}), 400
+    
+    # Save the image
+    file_path = unique_image_path(original_filename, app.config['IMAGES_FOLDER'])
+    save_stream(request.stream, file_path)
+    
+    return store_image_mapping(original_path, file_path)
+
+def _save_one(image_file, images_folder):
+    """Save one image from a batch upload under a unique name and return its path"""
+    file_path = unique_image_path(image_file.filename or "", images_folder)  # Handle possible None
+    save_stream(image_file.stream, file_path)
+    return file_path
+
+@app.route('/upload_images_batch', methods=['POST'])
+def upload_images_batch():
+    """Upload many product images in a single request"""
+    image_files = request.files.getlist('images')
+    original_paths = request.form.getlist('original_paths[]')
+    image_indexes = request.form.getlist('indexes[]')
+    
+    if not image_files:
+        return jsonify({'error': 'No image file part'}), 400
+    
+    if len(original_paths) != len(image_files) or len(image_indexes) != len(image_files):
+        return jsonify({'error': 'Missing image index or original path'}), 400
+    
+    # Validate every image before saving any of them
+    for image_file, image_index, original_path in zip(image_files, image_indexes, original_paths):
+        if image_file.filename == '':
+            return jsonify({'error': 'No image selected'}), 400
+        
+        if not allowed_image_file(image_file.filename):
+            return jsonify({'error': f'Image file type not allowed. Please upload one of: {", ".join(ALLOWED_IMAGE_EXTENSIONS)}'}), 400
+        
+        if not image_index or not original_path:
+            return jsonify({'error': 'Missing image index or original path'}), 400
+    
+    # Save the images in parallel
+    images_folder = app.config['IMAGES_FOLDER']
+    with ThreadPoolExecutor(max_workers=IMAGE_SAVE_WORKERS) as executor:
+        file_paths = list(executor.map(lambda image_file: _save_one(image_file, images_folder), image_files))
+    
+    # Store all the mappings from original path to uploaded path at once
+    mappings = dict(zip(original_paths, file_paths))
+    state = get_upload_state()
+    with _upload_state_lock:
+        state.setdefault('image_mappings', {}).update(mappings)
     
     return jsonify({
-        'success': True, 
-        'message': f'Image uploaded successfully',
-        'path': file_path
+        'success': True,
+        'message': f'{len(file_paths)} images uploaded successfully',
+        'paths': dict(zip(image_indexes, file_paths))
     })
 
 @app.route('/status', methods=['GET'])
 def get_status():
     """Get the current upload status"""
-    return jsonify(upload_status)
+    # Only re-serialize the status when it has changed since the last poll
+    with _status_lock:
+        if _status_cache["dirty"]:
+            _status_cache["bytes"] = app.json.dumps(upload_status)
+            _status_cache["dirty"] = False
+        body = _status_cache["bytes"]
+    
+    return Response(body, mimetype='application/json')
 
 @app.route('/pause', methods=['POST'])
 def pause_upload():
@@ -278,7 +1073,7 @@ def pause_upload():
     if upload_status["status"] != "running":
         return jsonify({'error': 'No active upload to pause'}), 400
     
-    upload_pause_event.set()
+    upload_resume_event.clear()
     return jsonify({'success': True, 'message': 'Upload paused'})
 
 @app.route('/resume', methods=['POST'])
@@ -287,7 +1082,7 @@ def resume_upload():
     if upload_status["status"] != "paused":
         return jsonify({'error': 'No paused upload to resume'}), 400
     
-    upload_pause_event.clear()
+    upload_resume_event.set()
     return jsonify({'success': True, 'message': 'Upload resumed'})
 
 @app.route('/stop', methods=['POST'])
@@ -297,7 +1092,7 @@ def stop_upload():
         return jsonify({'error': 'No active upload to stop'}), 400
     
     upload_stop_event.set()
-    upload_pause_event.clear()  # In case it was paused
+    upload_resume_event.set()  # Wake up any paused workers so they can stop
     return jsonify({'success': True, 'message': 'Upload stopped'})
 
 if __name__ == "__main__":
@@ -1,8 +1,8 @@
 import logging
-from app import app
+from app import app, setup_logging
 
 if __name__ == "__main__":
     # Set up logging
-    logging.basicConfig(level=logging.DEBUG)
+    setup_logging(level=logging.DEBUG)
     # Run the Flask application
     app.run(host="0.0.0.0", port=5000, debug=True)